@@ -0,0 +1,28 @@
+"""
+Django settings for running the test suite.
+
+Builds on the regular settings and creates the test schema straight from
+the models instead of replaying every migration.
+"""
+
+from app.settings import *  # noqa: F401,F403
+
+
+class DisableMigrations:
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
+
+# Password hashing is deliberately slow; tests only need a cheap one.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+DEBUG = False
+
+LOGGING_CONFIG = None
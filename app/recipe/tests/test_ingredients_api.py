@@ -7,20 +7,22 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 from decimal import Decimal
 
+UserModel = get_user_model()
 INGREDIENT_URL = reverse('recipe:ingredient-list')
+INGREDIENT_DETAIL_URL = reverse(
+    'recipe:ingredient-detail', args=[0]).replace('/0/', '/{}/')
 
 
 def detail_url(ingredient_id):
-    return reverse('recipe:ingredient-detail', args=[ingredient_id])
+    return INGREDIENT_DETAIL_URL.format(ingredient_id)
 
 
 def create_user(email='user@example.com', password='pass123'):
-    return get_user_model().objects.create_user(email, password)
+    return UserModel.objects.create_user(email, password)
 
 
 class PublicIngresientsAPITests(TestCase):
-    def setUp(self):
-        self.client = APIClient()
+    client_class = APIClient
 
     def test_auth_required(self):
         res = self.client.get(INGREDIENT_URL)
@@ -28,15 +30,22 @@ class PublicIngresientsAPITests(TestCase):
 
 
 class PrivateInredientsAPITests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
-        self.user = create_user()
-        self.client = APIClient()
         self.client.force_authenticate(self.user)
 
     def test_retrieve_ingerdients(self):
-        Ingredient.objects.create(user=self.user, name='eggs')
-        Ingredient.objects.create(user=self.user, name='vanilla')
-        res = self.client.get(INGREDIENT_URL)
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='eggs'),
+            Ingredient(user=self.user, name='vanilla'),
+        ])
+        with self.assertNumQueries(1):
+            res = self.client.get(INGREDIENT_URL)
         ingredients = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many=True)
 
@@ -80,10 +89,9 @@ class PrivateInredientsAPITests(TestCase):
         )
         recipe.ingredients.add(in1)
         res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
-        s1 = IngredientSerializer(in1)
-        s2 = IngredientSerializer(in2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        res_ids = {item['id'] for item in res.data}
+        self.assertIn(in1.id, res_ids)
+        self.assertNotIn(in2.id, res_ids)
     
     def test_filter_unique(self):
         in1 = Ingredient.objects.create(user=self.user, name='Ingredient1')
@@ -1,42 +1,73 @@
 from decimal import Decimal
-import tempfile
+from io import BytesIO
 import os
+import shutil
+import tempfile
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import (
+     APIClient,
+     APIRequestFactory,
+     force_authenticate,
+)
 from core.models import Recipe, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
+UserModel = get_user_model()
 RECIPE_URL = reverse('recipe:recipe-list')
+RECIPE_DETAIL_URL = reverse(
+     'recipe:recipe-detail', args=[0]).replace('/0/', '/{}/')
+IMAGE_UPLOAD_URL = reverse(
+     'recipe:recipe-upload-image', args=[0]).replace('/0/', '/{}/')
+RECIPE_PARTIAL_UPDATE = RecipeViewSet.as_view({'patch': 'partial_update'})
+RECIPE_DEFAULTS = {
+    'title': 'Sample title',
+    'time_minutes': 22,
+    'price': Decimal('5.25'),
+    'description': 'Sample description',
+    'link': 'http://example.com/recipe.pdf',
+}
 
 def detail_url(recipe_id):
-     return reverse('recipe:recipe-detail', args=[recipe_id])
+     return RECIPE_DETAIL_URL.format(recipe_id)
 
 def image_upload_url(recipe_id):
-     return reverse('recipe:recipe-upload-image', args=[recipe_id])
+     return IMAGE_UPLOAD_URL.format(recipe_id)
 
-def create_recipe(user, **params):
-    defaults = {
-        'title': 'Sample title',
-        'time_minutes': 22,
-        'price': Decimal('5.25'),
-        'description': 'Sample description',
-        'link': 'http://example.com/recipe.pdf',
-    }
+def partial_update(user, recipe_id, payload):
+     request = APIRequestFactory().patch(
+          detail_url(recipe_id), payload, format='json')
+     force_authenticate(request, user=user)
+     return RECIPE_PARTIAL_UPDATE(request, pk=recipe_id)
+
+def recipe_defaults(**params):
+    defaults = RECIPE_DEFAULTS.copy()
     defaults.update(params)
-    recipe = Recipe.objects.create(user=user, **defaults)
+    return defaults
+
+def create_recipe(user, **params):
+    recipe = Recipe.objects.create(user=user, **recipe_defaults(**params))
     return recipe
 
+def create_recipes(user, n=None, titles=None, **params):
+    title = params.pop('title', RECIPE_DEFAULTS['title'])
+    titles = titles or [title] * n
+    recipes = [
+        Recipe(user=user, **recipe_defaults(title=t, **params))
+        for t in titles
+    ]
+    return Recipe.objects.bulk_create(recipes)
+
 def create_user(**params):
-     return get_user_model().objects.create_user(**params)
+     return UserModel.objects.create_user(**params)
 
 class PublicRecipeAPITests(TestCase): 
      
-     def setUp(self):
-          self.client = APIClient()
+     client_class = APIClient
 
      def test_auth_required(self):
           res = self.client.get(RECIPE_URL)
@@ -44,15 +75,23 @@ class PublicRecipeAPITests(TestCase):
 
 class PrivateReсipeApi(TestCase):
 
+     client_class = APIClient
+
+     @classmethod
+     def setUpTestData(cls):
+          cls.user = create_user(email='user@example.com', password='testpass123')
+
      def setUp(self):
-          self.client = APIClient()
-          self.user = create_user(email='user@example.com', password='testpass123')
           self.client.force_authenticate(self.user)
 
      def test_retrieve_recipe(self):
-          create_recipe(user=self.user)
-          create_recipe(user=self.user)
-          res = self.client.get(RECIPE_URL)
+          tag = Tag.objects.create(user=self.user, name='Dinner')
+          ingredient = Ingredient.objects.create(user=self.user, name='salt')
+          for recipe in create_recipes(self.user, 2):
+               recipe.tags.add(tag)
+               recipe.ingredients.add(ingredient)
+          with self.assertNumQueries(3):
+               res = self.client.get(RECIPE_URL)
           recipes = Recipe.objects.all().order_by('-id')
           serializer = RecipeSerializer(recipes, many=True)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -62,7 +101,8 @@ class PrivateReсipeApi(TestCase):
           other_user = create_user(email='other@example.com', password='password123')
           create_recipe(user=other_user)
           create_recipe(user=self.user)
-          res = self.client.get(RECIPE_URL)
+          with self.assertNumQueries(3):
+               res = self.client.get(RECIPE_URL)
           recipes = Recipe.objects.filter(user=self.user)
           serializer = RecipeSerializer(recipes, many=True)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -90,43 +130,43 @@ class PrivateReсipeApi(TestCase):
                self.assertEqual(getattr(recipe, k), v)
           self.assertEqual(recipe.user, self.user)
      
-     def test_partial_update(self):
+     def test_update(self):
           original_link = 'https://example.com/recipe.pdf'
-          recipe = create_recipe(
-               user=self.user,
-               title='Sample title',
-               link=original_link,
-          )
-          payload = {'title': 'Sample title'}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload)
-          self.assertEqual(res.status_code, status.HTTP_200_OK)
-          recipe.refresh_from_db()
-          self.assertEqual(recipe.title, payload['title'])
-          self.assertEqual(recipe.link, original_link)
-          self.assertEqual(recipe.user, self.user)
-     
-     def test_full_update(self):
-          recipe = create_recipe(
-               user=self.user,
-               title='Sample Title',
-               link='https://example.com/recipe.pdf',
-               description='Description',
-          )
-          payload = {
+          full_payload = {
                'title': 'New Recipe',
                'link': 'https://example.com/recipe123.pdf',
                'description': 'Descriprion 2.0',
                'time_minutes': 20,
                'price': Decimal('2.50')
           }
-          url = detail_url(recipe.id)
-          res = self.client.put(url, payload)
-          self.assertEqual(res.status_code, status.HTTP_200_OK)
-          recipe.refresh_from_db()
-          for k, v in payload.items():
-               self.assertEqual(getattr(recipe, k), v)
-          self.assertEqual(recipe.user, self.user)
+          cases = [
+               (
+                    'patch',
+                    {'title': 'Sample title', 'link': original_link},
+                    {'title': 'Sample title'},
+                    {'title': 'Sample title', 'link': original_link},
+               ),
+               (
+                    'put',
+                    {
+                         'title': 'Sample Title',
+                         'link': original_link,
+                         'description': 'Description',
+                    },
+                    full_payload,
+                    full_payload,
+               ),
+          ]
+          for method, params, payload, expected in cases:
+               with self.subTest(method=method):
+                    recipe = create_recipe(user=self.user, **params)
+                    url = detail_url(recipe.id)
+                    res = getattr(self.client, method)(url, payload)
+                    self.assertEqual(res.status_code, status.HTTP_200_OK)
+                    recipe.refresh_from_db()
+                    for k, v in expected.items():
+                         self.assertEqual(getattr(recipe, k), v)
+                    self.assertEqual(recipe.user, self.user)
      
      def test_update_error(self):
           new_user = create_user(email='user12@example.com', password='testpass123')
@@ -138,20 +178,20 @@ class PrivateReсipeApi(TestCase):
           self.assertEqual(recipe.user, self.user)
 
 
-     def test_delete_recipe(self):
-          recipe = create_recipe(user=self.user)
-          url = detail_url(recipe.id)
-          res = self.client.delete(url)
-          self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
-          self.assertFalse(Recipe.objects.filter(id=recipe.id).exists())
-     
-     def test_delete_other_error(self):
-          new_user = create_user(email='user3@example.com', password='testpass123')
-          recipe = create_recipe(user=new_user)
-          url = detail_url(recipe.id)
-          res = self.client.delete(url)
-          self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
-          self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+     def test_delete(self):
+          other_user = create_user(email='user3@example.com', password='testpass123')
+          cases = [
+               (self.user, status.HTTP_204_NO_CONTENT, False),
+               (other_user, status.HTTP_404_NOT_FOUND, True),
+          ]
+          for owner, expected_status, still_exists in cases:
+               with self.subTest(owner=owner.email):
+                    recipe = create_recipe(user=owner)
+                    url = detail_url(recipe.id)
+                    res = self.client.delete(url)
+                    self.assertEqual(res.status_code, expected_status)
+                    exists = Recipe.objects.filter(id=recipe.id).exists()
+                    self.assertEqual(exists, still_exists)
 
      def test_create_tag(self):
         payload = {
@@ -164,16 +204,16 @@ class PrivateReсipeApi(TestCase):
         res = self.client.post(RECIPE_URL, payload, format='json')
         
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        recipes = Recipe.objects.filter(user=self.user)
-        self.assertEqual(recipes.count(), 1)
+        recipes = list(Recipe.objects.filter(user=self.user))
+        self.assertEqual(len(recipes), 1)
         recipe = recipes[0]
         self.assertEqual(recipe.tags.count(), 2)
-        for tag in payload['tags']:
-             exists = recipe.tags.filter(
-                  name=tag['name'],
-                  user=self.user,
-             ).exists()
-             self.assertTrue(exists)
+        names = {tag['name'] for tag in payload['tags']}
+        found = set(recipe.tags.filter(
+             name__in=names,
+             user=self.user,
+        ).values_list('name', flat=True))
+        self.assertEqual(found, names)
      
      def test_tags_exists_recipes(self):
           tag_indian = Tag.objects.create(user=self.user, name='Indian')
@@ -185,17 +225,17 @@ class PrivateReсipeApi(TestCase):
           }
           res = self.client.post(RECIPE_URL, payload, format='json')
           self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-          recipes = Recipe.objects.filter(user=self.user)
-          self.assertEqual(recipes.count(), 1)
+          recipes = list(Recipe.objects.filter(user=self.user))
+          self.assertEqual(len(recipes), 1)
           recipe = recipes[0]
           self.assertEqual(recipe.tags.count(), 2)
           self.assertIn(tag_indian, recipe.tags.all())
-          for tag in payload['tags']:
-             exists = recipe.tags.filter(
-                  name=tag['name'],
-                  user=self.user,
-             ).exists()
-             self.assertTrue(exists)
+          names = {tag['name'] for tag in payload['tags']}
+          found = set(recipe.tags.filter(
+               name__in=names,
+               user=self.user,
+          ).values_list('name', flat=True))
+          self.assertEqual(found, names)
 
      def test_create_tag_on_update(self):
           recipe = create_recipe(user=self.user)
@@ -207,13 +247,17 @@ class PrivateReсipeApi(TestCase):
           self.assertIn(new_tag, recipe.tags.all())
      
      def test_update_assigning(self):
-          tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
-          recipe = create_recipe(user=self.user) 
-          recipe.tags.add(tag_breakfast)
-          tag_lunch = Tag.objects.create(user=self.user, name='lunch')
+          tag_breakfast, tag_lunch = Tag.objects.bulk_create([
+               Tag(user=self.user, name='Breakfast'),
+               Tag(user=self.user, name='lunch'),
+          ])
+          recipe = create_recipe(user=self.user)
+          RecipeTag = recipe.tags.through
+          RecipeTag.objects.bulk_create([
+               RecipeTag(recipe_id=recipe.id, tag_id=tag_breakfast.id),
+          ])
           payload = {'tags': [{'name': 'lunch'}]}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload, format='json')
+          res = partial_update(self.user, recipe.id, payload)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           self.assertIn(tag_lunch, recipe.tags.all())
           self.assertNotIn(tag_breakfast, recipe.tags.all())
@@ -221,10 +265,12 @@ class PrivateReсipeApi(TestCase):
      def test_clear_recipe_tags(self):
           tag = Tag.objects.create(user=self.user, name='Lunch')
           recipe = create_recipe(user=self.user)
-          recipe.tags.add(tag)
+          RecipeTag = recipe.tags.through
+          RecipeTag.objects.bulk_create([
+               RecipeTag(recipe_id=recipe.id, tag_id=tag.id),
+          ])
           payload = {'tags': []}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload, format='json')
+          res = partial_update(self.user, recipe.id, payload)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           self.assertEqual(recipe.tags.count(), 0)
      
@@ -239,14 +285,16 @@ class PrivateReсipeApi(TestCase):
           res = self.client.post(RECIPE_URL, payload, format='json')
 
           self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-          recipes = Recipe.objects.filter(user=self.user)
-          self.assertEqual(recipes.count(), 1)
+          recipes = list(Recipe.objects.filter(user=self.user))
+          self.assertEqual(len(recipes), 1)
           recipe = recipes[0]
           self.assertEqual(recipe.ingredients.count(), 2)
-          for ingredient in payload['ingredients']:
-               exists = recipe.ingredients.filter(name=ingredient['name'],
-                                                  user=self.user).exists()
-               self.assertTrue(exists) 
+          names = {ingredient['name'] for ingredient in payload['ingredients']}
+          found = set(recipe.ingredients.filter(
+               name__in=names,
+               user=self.user,
+          ).values_list('name', flat=True))
+          self.assertEqual(found, names) 
 
      def test_existing_ingredients(self):
           ingredient = Ingredient.objects.create(user=self.user, name='butter')
@@ -259,34 +307,40 @@ class PrivateReсipeApi(TestCase):
           }
           res = self.client.post(RECIPE_URL, payload, format='json')
           self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-          recipes = Recipe.objects.filter(user=self.user)
-          self.assertEqual(recipes.count(), 1)
+          recipes = list(Recipe.objects.filter(user=self.user))
+          self.assertEqual(len(recipes), 1)
           recipe = recipes[0]
           self.assertEqual(recipe.ingredients.count(), 2)
           self.assertIn(ingredient, recipe.ingredients.all())
-          for ingredient in payload['ingredients']:
-               exists = recipe.ingredients.filter(name=ingredient['name'],
-                                                  user=self.user).exists()
-               self.assertTrue(exists)
+          names = {ingredient['name'] for ingredient in payload['ingredients']}
+          found = set(recipe.ingredients.filter(
+               name__in=names,
+               user=self.user,
+          ).values_list('name', flat=True))
+          self.assertEqual(found, names)
           
      def test_update_ingredients(self):
           recipe = create_recipe(user=self.user)
           payload = {'ingredients': [{'name': 'water'}]}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload, format='json')
+          res = partial_update(self.user, recipe.id, payload)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           new_ingr = Ingredient.objects.get(user=self.user, name='water')
           self.assertIn(new_ingr, recipe.ingredients.all())
      
 
      def test_update_assign_ingredients(self):
-          ingredient1 = Ingredient.objects.create(user=self.user, name='butter')
-          ingredient2 = Ingredient.objects.create(user=self.user, name='water')
+          ingredient1, ingredient2 = Ingredient.objects.bulk_create([
+               Ingredient(user=self.user, name='butter'),
+               Ingredient(user=self.user, name='water'),
+          ])
           recipe = create_recipe(user=self.user)
-          recipe.ingredients.add(ingredient1)
+          RecipeIngredient = recipe.ingredients.through
+          RecipeIngredient.objects.bulk_create([
+               RecipeIngredient(
+                    recipe_id=recipe.id, ingredient_id=ingredient1.id),
+          ])
           payload = {'ingredients': [{'name': 'water'}]}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload, format='json')
+          res = partial_update(self.user, recipe.id, payload)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           self.assertIn(ingredient2, recipe.ingredients.all())
           new_ingr = Ingredient.objects.get(user=self.user, name='water')
@@ -296,70 +350,83 @@ class PrivateReсipeApi(TestCase):
      def test_clear_ingredients(self):
           ingredient = Ingredient.objects.create(user=self.user, name='Cock')
           recipe = create_recipe(user=self.user)
-          recipe.ingredients.add(ingredient)
+          RecipeIngredient = recipe.ingredients.through
+          RecipeIngredient.objects.bulk_create([
+               RecipeIngredient(
+                    recipe_id=recipe.id, ingredient_id=ingredient.id),
+          ])
           payload = {'ingredients': []}
-          url = detail_url(recipe.id)
-          res = self.client.patch(url, payload, format='json')
+          res = partial_update(self.user, recipe.id, payload)
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           self.assertEqual(recipe.ingredients.count(), 0)
 
      def test_filtr_by_tags(self):
-          r1 = create_recipe(user=self.user, title='Recipe1')
-          r2 = create_recipe(user=self.user, title='Recipe2')
+          r1, r2, r3 = create_recipes(
+               self.user, titles=['Recipe1', 'Recipe2', 'Recie3'])
           t1 = Tag.objects.create(user=self.user, name='Tag1')
           t2 = Tag.objects.create(user=self.user, name='Tag2')
           r1.tags.add(t1)
           r2.tags.add(t2)
-          r3 = create_recipe(user=self.user, title='Recie3')
           params = {'tags': f'{t1.id}, {t2.id}'}
           res = self.client.get(RECIPE_URL, params)
-          s1 = RecipeSerializer(r1)
-          s2 = RecipeSerializer(r2)
-          s3 = RecipeSerializer(r3)
-          self.assertIn(s1.data, res.data)
-          self.assertIn(s2.data, res.data)
-          self.assertNotIn(s3.data, res.data)
+          res_ids = {recipe['id'] for recipe in res.data}
+          self.assertIn(r1.id, res_ids)
+          self.assertIn(r2.id, res_ids)
+          self.assertNotIn(r3.id, res_ids)
 
      def test_filter_by_ingredients(self):
-          r1 = create_recipe(user=self.user, title='Recipe1')
-          r2 = create_recipe(user=self.user, title='Recipe2')
+          r1, r2, r3 = create_recipes(
+               self.user, titles=['Recipe1', 'Recipe2', 'Recie3'])
           i1 = Ingredient.objects.create(user=self.user, name='Ingredient1')
           i2 = Ingredient.objects.create(user=self.user, name='Ingredient2')
           r1.ingredients.add(i1)
           r2.ingredients.add(i2)
-          r3 = create_recipe(user=self.user, title='Recie3')
           params = {'ingredients': f'{i1.id}, {i2.id}'}
           res = self.client.get(RECIPE_URL, params)
-          s1 = RecipeSerializer(r1)
-          s2 = RecipeSerializer(r2)
-          s3 = RecipeSerializer(r3)
-          self.assertIn(s1.data, res.data)
-          self.assertIn(s2.data, res.data)
-          self.assertNotIn(s3.data, res.data)
+          res_ids = {recipe['id'] for recipe in res.data}
+          self.assertIn(r1.id, res_ids)
+          self.assertIn(r2.id, res_ids)
+          self.assertNotIn(r3.id, res_ids)
 
 
 
 class ImageUploadTests(TestCase):
-     def setUp(self):
-          self.client = APIClient()
-          self.user = get_user_model().objects.create_user(
+     client_class = APIClient
+
+     @classmethod
+     def setUpClass(cls):
+          cls.media_root = tempfile.mkdtemp(
+               dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+          cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+          cls.media_override.enable()
+          super().setUpClass()
+
+     @classmethod
+     def tearDownClass(cls):
+          super().tearDownClass()
+          cls.media_override.disable()
+          shutil.rmtree(cls.media_root, ignore_errors=True)
+
+     @classmethod
+     def setUpTestData(cls):
+          cls.user = UserModel.objects.create_user(
                'user@example.com',
                'pass123'
           )
+          cls.recipe = create_recipe(user=cls.user)
+
+     def setUp(self):
           self.client.force_authenticate(self.user)
-          self.recipe = create_recipe(user=self.user)
-     
-     def tearDown(self):
-          self.recipe.image.delete()
      
      def test_upload_image(self):
           url = image_upload_url(self.recipe.id)
-          with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
-               img = Image.new('RGB', (10, 10))
-               img.save(image_file, format='JPEG')
-               image_file.seek(0)
-               payload = {'image': image_file}
-               res = self.client.post(url, payload, format='multipart')
+          image_file = BytesIO()
+          image_file.name = 'test.jpg'
+          img = Image.new('RGB', (10, 10))
+          img.save(image_file, format='JPEG')
+          image_file.seek(0)
+          payload = {'image': image_file}
+          res = self.client.post(url, payload, format='multipart')
           self.recipe.refresh_from_db()
           self.assertEqual(res.status_code, status.HTTP_200_OK)
           self.assertIn('image', res.data)
@@ -45,7 +45,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
               ingredient_ids = self._params_to_ints(ingredients)
               queryset = queryset.filter(ingredients__id__in=ingredient_ids)
          return queryset.filter(
-              user=self.request.user).order_by('-id').distinct()
+              user=self.request.user
+         ).order_by('-id').distinct().prefetch_related('tags', 'ingredients')
      
     def get_serializer_class(self):
          if self.action == 'list':
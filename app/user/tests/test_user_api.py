@@ -5,16 +5,16 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+UserModel = get_user_model()
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
 
 def create_user(**params):
-    return get_user_model().objects.create_user(**params)
+    return UserModel.objects.create_user(**params)
 
 class PublicUserApiTest(TestCase):
-    def setUp(self):
-        self.client = APIClient()
+    client_class = APIClient
     
     def test_create_user(self):
         payload = {
@@ -25,7 +25,7 @@ class PublicUserApiTest(TestCase):
         res = self.client.post(CREATE_USER_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        user = get_user_model().objects.get(email=payload['email'])
+        user = UserModel.objects.get(email=payload['email'])
         self.assertTrue(user.check_password(payload['password']))
         self.assertNotIn('password', res.data)
 
@@ -47,7 +47,7 @@ class PublicUserApiTest(TestCase):
         }
         res = self.client.post(CREATE_USER_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
-        user_exists = get_user_model().objects.filter(
+        user_exists = UserModel.objects.filter(
             email=payload['email']
         ).exists()
         self.assertFalse(user_exists)
@@ -91,13 +91,17 @@ class PublicUserApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 class PrivateUserAPITests(TestCase):
-    def setUp(self):
-        self.user = create_user(
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(
             email='test@example.com',
             password='testpass123',
             name='Test Name',
         )
-        self.client = APIClient()
+
+    def setUp(self):
         self.client.force_authenticate(user=self.user)
 
     def test_retrieve_profile_success(self):